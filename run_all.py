@@ -10,6 +10,10 @@ PARSED_JSON = "output/parsed.json"
 QUESTIONS_JSON = "output/questions.json"
 IMAGES_DIR = "output/images"
 FINAL_DOCX = "output/result.docx"
+COMPACT_IMAGES = False      # 1-bit optimized PNGs rendered at IMAGE_DPI instead of full RGB PNGs
+SVG_COPIES = False          # also write vector .svg copies of the diagrams (not embedded in result.docx)
+IMAGE_DPI = 150
+IMAGE_BUDGET = None         # max total bytes of images embedded in result.docx, None = no limit
 
 # ANSI Colors
 GREEN = "\033[92m"
@@ -65,7 +69,7 @@ def summary_report():
         images = [f for f in os.listdir(IMAGES_DIR) if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
         print(f"{CYAN}Generated Images:{RESET} {len(images)}")
     if os.path.exists(FINAL_DOCX):
-        print(f"{CYAN}Final Document:{RESET} {FINAL_DOCX}")
+        print(f"{CYAN}Final Document:{RESET} {FINAL_DOCX} ({os.path.getsize(FINAL_DOCX)} bytes)")
     print(f"{GREEN}======================{RESET}\n")
 
 if __name__ == "__main__":
@@ -87,17 +91,22 @@ if __name__ == "__main__":
 
     # Step 3: Generate Images
     ensure_dir(IMAGES_DIR)
+    image_opts = f" --format compact --dpi {IMAGE_DPI}" if COMPACT_IMAGES else ""
+    if SVG_COPIES:
+        image_opts += " --svg"
     run_step(
         "Generating images from questions.json",
-        f'python src/image_gen.py --input "{QUESTIONS_JSON}" --out "{IMAGES_DIR}"',
+        f'python src/image_gen.py --input "{QUESTIONS_JSON}" --out "{IMAGES_DIR}"{image_opts}',
         skip_if_exists=None  # Always re-run in case images changed
     )
 
     # Step 4: Build Final DOCX
     safe_remove(FINAL_DOCX)
+    # images are already compact when COMPACT_IMAGES is set; build_doc only re-encodes to enforce a budget
+    doc_opts = f" --dpi {IMAGE_DPI} --image-budget {IMAGE_BUDGET}" if IMAGE_BUDGET is not None else ""
     run_step(
         "Building final result.docx",
-        f'python src/build_doc.py --input "{QUESTIONS_JSON}" --images "{IMAGES_DIR}" --out "{FINAL_DOCX}"',
+        f'python src/build_doc.py --input "{QUESTIONS_JSON}" --images "{IMAGES_DIR}" --out "{FINAL_DOCX}"{doc_opts}',
         skip_if_exists=None
     )
 
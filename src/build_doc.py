@@ -3,16 +3,107 @@
 Assemble the final Word doc in the required 'Question Output Format'.
 Usage:
   python build_doc.py --input output/questions.json --images output/images/ --out output/result.docx
+  python build_doc.py --input output/questions.json --images output/images/ --out output/result.docx --compact --image-budget 200000
 """
 import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 import argparse
+import hashlib
+import io
 from docx import Document
 from docx.shared import Inches
-from utils import load_json, ensure_dir
+from utils import load_json, ensure_dir, positive_int, non_negative_int
+from image_gen import EMBED_WIDTH_IN, DEFAULT_DPI, compact_png_bytes
 
+# python-docx can only embed raster images, .svg copies are skipped
+RASTER_EXTS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tif', '.tiff')
+MIN_DPI = 50
 
-def insert_question_block(doc, q, image_path=None):
+
+class ImagePacker:
+    """
+    Re-encodes figures as 1-bit PNGs before embedding and keeps the document
+    under an optional byte budget. Tracks source vs embedded sizes for the report.
+    python-docx stores identical images once (keyed by SHA1), so each unique
+    encoded image is charged to the budget only once.
+    """
+    def __init__(self, dpi=DEFAULT_DPI, budget=None):
+        self.dpi = dpi
+        self.budget = budget
+        self.source_bytes = 0
+        self.embedded_bytes = 0
+        self.embedded = 0
+        self.dropped = {}  # path -> source bytes
+        self._seen_sources = set()
+        self._seen_images = set()
+        self._encoded = {}  # (realpath, dpi) -> compact PNG bytes
+
+    def _encode(self, image_path, dpi):
+        key = (os.path.realpath(image_path), dpi)
+        if key not in self._encoded:
+            self._encoded[key] = compact_png_bytes(image_path, dpi)
+        return self._encoded[key]
+
+    def _count_source(self, image_path):
+        key = os.path.realpath(image_path)
+        if key not in self._seen_sources:
+            self._seen_sources.add(key)
+            self.source_bytes += os.path.getsize(image_path)
+
+    def plan(self, image_paths):
+        """
+        First pass: pick one DPI for every figure so the whole document fits the budget,
+        halving from --dpi down to MIN_DPI. Figures are only dropped (in document order)
+        if even MIN_DPI does not fit.
+        """
+        if self.budget is None:
+            return self.dpi
+        paths = []
+        for path in dict.fromkeys(p for p in image_paths if p and os.path.exists(p)):
+            try:
+                self._encode(path, self.dpi)
+            except Exception:
+                continue  # prepare() hits the same error and insert_question_block reports it
+            paths.append(path)
+        dpi, prev_total = self.dpi, None
+        while True:
+            unique = {hashlib.sha1(d).digest(): len(d) for d in (self._encode(p, dpi) for p in paths)}
+            total = sum(unique.values())
+            # stop once it fits, at the floor, or when halving no longer shrinks anything
+            if total <= self.budget or dpi <= MIN_DPI or total == prev_total:
+                break
+            dpi, prev_total = max(MIN_DPI, dpi // 2), total
+        self.dpi = dpi
+        return dpi
+
+    def prepare(self, image_path):
+        """Return a stream to embed, or None if the image cannot fit in the remaining budget."""
+        data = self._encode(image_path, self.dpi)
+        digest = hashlib.sha1(data).hexdigest()
+        self._count_source(image_path)
+        if digest not in self._seen_images:
+            if self.budget is not None and len(data) > self.budget - self.embedded_bytes:
+                self.dropped[image_path] = os.path.getsize(image_path)
+                return None
+            self._seen_images.add(digest)
+            self.embedded_bytes += len(data)
+        self.embedded += 1
+        return io.BytesIO(data)
+
+    def report(self):
+        saved = self.source_bytes - self.embedded_bytes
+        pct = 100.0 * saved / self.source_bytes if self.source_bytes else 0.0
+        print(f"Images embedded: {self.embedded} ({len(self._seen_images)} unique), dropped (over budget): {len(self.dropped)}")
+        for path, size in self.dropped.items():
+            print(f"  dropped {path} ({size} bytes)")
+        note = ", incl. dropped" if self.dropped else ""
+        print(f"Image bytes (source files -> embedded): {self.source_bytes} -> {self.embedded_bytes} "
+              f"(saved {saved}, {pct:.1f}%{note})")
+        if self.budget is not None:
+            print(f"Image budget: {self.embedded_bytes}/{self.budget} bytes used at {self.dpi} DPI")
+
+
+def insert_question_block(doc, q, image_path=None, packer=None):
     # Title (as @title)
     doc.add_paragraph(f"@title {q.get('title','')}")
     doc.add_paragraph(f"@description {q.get('description','')}")
@@ -38,7 +129,11 @@ def insert_question_block(doc, q, image_path=None):
         doc.add_paragraph("Figure:")
         # insert scaled image
         try:
-            doc.add_picture(image_path, width=Inches(3.5))
+            picture = packer.prepare(image_path) if packer else image_path
+            if picture is None:
+                doc.add_paragraph(f"[Image omitted, over image budget: {image_path}]")
+            else:
+                doc.add_picture(picture, width=Inches(EMBED_WIDTH_IN))
         except Exception:
             doc.add_paragraph(f"[Image could not be inserted: {image_path}]")
     # page break between questions
@@ -49,6 +144,13 @@ def main():
     parser.add_argument("--input", required=True)
     parser.add_argument("--images", required=False, default=None)
     parser.add_argument("--out", required=True)
+    parser.add_argument("--compact", action="store_true",
+                        help="embed images as 1-bit optimized PNGs sized for the page at --dpi")
+    parser.add_argument("--dpi", type=positive_int, default=DEFAULT_DPI,
+                        help="--compact caps embedded images at this DPI (existing files are never upsampled)")
+    parser.add_argument("--image-budget", type=non_negative_int, default=None,
+                        help="max total bytes of embedded images (implies --compact); all figures are "
+                             "downscaled to one DPI that fits, figures are dropped only if MIN_DPI does not")
     args = parser.parse_args()
 
     data = load_json(args.input)
@@ -56,12 +158,17 @@ def main():
     if args.images:
         # map order -> image path by looking through folder
         for fname in os.listdir(args.images):
+            if not fname.lower().endswith(RASTER_EXTS):
+                continue
             # expecting filenames like '..._table.png' or '..._balls.png'
             # heuristics: parse trailing order if present, otherwise use name index
             images_map[fname] = os.path.join(args.images, fname)
-    doc = Document()
-    doc.add_heading("Auto-generated Questions", level=1)
-    for q in data.get("questions", []):
+    packer = None
+    if args.compact or args.image_budget is not None:
+        packer = ImagePacker(dpi=args.dpi, budget=args.image_budget)
+    questions = data.get("questions", [])
+    image_paths = []
+    for q in questions:
         img_path = None
         # choose image by searching images_map keys for q title
         if args.images:
@@ -77,10 +184,19 @@ def main():
                     if str(q.get('order')) in fname:
                         img_path = path
                         break
-        insert_question_block(doc, q, image_path=img_path)
+        image_paths.append(img_path)
+    if packer:
+        packer.plan(image_paths)
+    doc = Document()
+    doc.add_heading("Auto-generated Questions", level=1)
+    for q, img_path in zip(questions, image_paths):
+        insert_question_block(doc, q, image_path=img_path, packer=packer)
     ensure_dir(os.path.dirname(args.out) or ".")
     doc.save(args.out)
     print("Saved final doc to", args.out)
+    if packer:
+        packer.report()
+    print("Document size:", os.path.getsize(args.out), "bytes")
 
 if __name__ == "__main__":
     main()
@@ -3,64 +3,181 @@
 Programmatic image generator for math diagrams using Pillow.
 Usage:
   python image_gen.py --input output/questions.json --out output/images
+  python image_gen.py --input output/questions.json --out output/images --format compact --dpi 150 --svg
 """
 import argparse
+import io
 import os
 from PIL import Image, ImageDraw, ImageFont
-from utils import load_json, ensure_dir
+from utils import load_json, ensure_dir, positive_int
 
-def make_uniform_table_image(shirts, pants, outpath, cellw=140, cellh=60):
-    cols = max(len(shirts), len(pants))
-    width = cellw * 2 + 40
-    height = (cols+1) * cellh + 40
-    img = Image.new("RGB", (width, height), "white")
-    draw = ImageDraw.Draw(img)
+# build_doc.py embeds every figure at this width
+EMBED_WIDTH_IN = 3.5
+DEFAULT_DPI = 150
+
+
+def _load_font(size):
     try:
-        font = ImageFont.truetype("DejaVuSans.ttf", 16)
-    except:
-        font = ImageFont.load_default()
+        return ImageFont.truetype("DejaVuSans.ttf", size)
+    except OSError:
+        try:
+            return ImageFont.load_default(size)
+        except TypeError:  # Pillow < 10.1 has no scalable default font
+            return ImageFont.load_default()
 
-    x0, y0 = 20, 20
-    draw.rectangle([x0, y0, x0 + cellw - 1, y0 + cellh - 1], outline="black")
-    draw.rectangle([x0 + cellw, y0, x0 + cellw*2 - 1, y0 + cellh - 1], outline="black")
-    draw.text((x0 + 10, y0 + 15), "Shirt Color", font=font, fill="black")
-    draw.text((x0 + cellw + 10, y0 + 15), "Pants Color", font=font, fill="black")
+def _png_size(img):
+    """Bytes of `img` saved as a plain PNG, i.e. what --format png would write."""
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.tell()
 
-    y = y0 + cellh
-    for i in range(cols):
-        draw.rectangle([x0, y, x0 + cellw - 1, y + cellh - 1], outline="black")
-        draw.rectangle([x0 + cellw, y, x0 + cellw*2 - 1, y + cellh - 1], outline="black")
-        s = shirts[i] if i < len(shirts) else ""
-        p = pants[i] if i < len(pants) else ""
-        draw.text((x0 + 10, y + 15), s, font=font, fill="black")
-        draw.text((x0 + cellw + 10, y + 15), p, font=font, fill="black")
-        y += cellh
+def _record(stats, outpath, rgb_bytes, out_bytes):
+    if stats is not None:
+        stats[outpath] = (rgb_bytes, out_bytes)
+
+def to_line_art(img, dpi=DEFAULT_DPI, threshold=200):
+    """
+    Reduce black-on-white line art to a 1-bit image. `dpi` only caps the width at
+    EMBED_WIDTH_IN * dpi; smaller images are never upsampled.
+    Anything darker than `threshold` becomes black, so thin anti-aliased strokes survive downscaling.
+    """
+    if img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info):
+        # flatten transparency onto white, otherwise transparent pixels turn black
+        rgba = img.convert("RGBA")
+        img = Image.alpha_composite(Image.new("RGBA", rgba.size, "white"), rgba)
+    img = img.convert("L")
+    max_w = int(EMBED_WIDTH_IN * dpi)
+    if img.width > max_w:
+        h = max(1, round(img.height * max_w / img.width))
+        img = img.resize((max_w, h), Image.LANCZOS)
+    return img.point(lambda v: 255 if v >= threshold else 0, mode="1")
+
+def compact_png_bytes(src, dpi=DEFAULT_DPI):
+    """
+    Encode an image (path or PIL image) as an optimized 1-bit PNG, returning the bytes.
+    The dpi metadata is the resolution the image actually has at EMBED_WIDTH_IN.
+    """
+    if isinstance(src, (str, os.PathLike)):
+        with Image.open(src) as img:
+            return compact_png_bytes(img, dpi)
+    art = to_line_art(src, dpi)
+    real_dpi = max(1, round(art.width / EMBED_WIDTH_IN))
+    buf = io.BytesIO()
+    art.save(buf, format="PNG", optimize=True, dpi=(real_dpi, real_dpi))
+    return buf.getvalue()
+
+def save_image(img, outpath, fmt="png", dpi=DEFAULT_DPI):
+    """Save a rendered image as full RGB ('png') or as a compact 1-bit PNG ('compact'). Returns bytes written."""
+    if fmt == "compact":
+        with open(outpath, "wb") as f:
+            return f.write(compact_png_bytes(img, dpi))
     img.save(outpath)
-    print("Saved table image:", outpath)
-    return outpath
+    return os.path.getsize(outpath)
+
+# --- diagram layouts: plain geometry shared by the raster and SVG renderers ---
+def uniform_table_layout(shirts, pants, cellw=140, cellh=60):
+    cols = max(len(shirts), len(pants))
+    x0, y0 = 20, 20
+    rows = [("Shirt Color", "Pants Color")]
+    for i in range(cols):
+        rows.append((shirts[i] if i < len(shirts) else "", pants[i] if i < len(pants) else ""))
+    rects, texts = [], []
+    for i, (s, p) in enumerate(rows):
+        y = y0 + i*cellh
+        rects += [(x0, y, cellw, cellh), (x0 + cellw, y, cellw, cellh)]
+        texts += [(x0 + 10, y + 15, s, 16), (x0 + cellw + 10, y + 15, p, 16)]
+    return {
+        "size": (cellw * 2 + 40, (cols+1) * cellh + 40),
+        "rects": rects,
+        "circles": [],
+        "texts": texts,
+    }
 
-def make_packed_balls_image(rows, cols, radius, outpath, spacing=None):
+def packed_balls_layout(rows, cols, radius, spacing=None):
     spacing = spacing if spacing is not None else radius*2 + 4
     width = cols * spacing + 40
     height = rows * spacing + 40
-    img = Image.new("RGB", (width, height), "white")
-    draw = ImageDraw.Draw(img)
-    try:
-        font = ImageFont.truetype("DejaVuSans.ttf", 14)
-    except:
-        font = ImageFont.load_default()
     x0, y0 = 20, 20
+    circles = []
     for r in range(rows):
         for c in range(cols):
             cx = x0 + c*spacing + spacing//2
             cy = y0 + r*spacing + spacing//2
-            draw.ellipse([cx - radius, cy - radius, cx + radius, cy + radius], outline="black", fill=None)
-    draw.text((10, height - 20), f"Each circle radius={radius} units", font=font, fill="black")
-    img.save(outpath)
+            circles.append((cx, cy, radius))
+    return {
+        "size": (width, height),
+        "rects": [],
+        "circles": circles,
+        "texts": [(10, height - 20, f"Each circle radius={radius} units", 14)],
+    }
+
+def render_layout(layout, scale=1.0):
+    """Draw a layout as an RGB image, scaling coordinates, strokes and font sizes by `scale`."""
+    def sc(v):
+        return round(v * scale)
+    w, h = layout["size"]
+    img = Image.new("RGB", (max(1, sc(w)), max(1, sc(h))), "white")
+    draw = ImageDraw.Draw(img)
+    stroke = max(1, sc(1))
+    for x, y, rw, rh in layout["rects"]:
+        draw.rectangle([sc(x), sc(y), sc(x + rw) - 1, sc(y + rh) - 1], outline="black", width=stroke)
+    for cx, cy, r in layout["circles"]:
+        draw.ellipse([sc(cx - r), sc(cy - r), sc(cx + r), sc(cy + r)], outline="black", width=stroke)
+    fonts = {}
+    for x, y, text, size in layout["texts"]:
+        if size not in fonts:
+            fonts[size] = _load_font(max(1, sc(size)))
+        draw.text((sc(x), sc(y)), text, font=fonts[size], fill="black")
+    return img
+
+def save_layout(layout, outpath, fmt="png", dpi=DEFAULT_DPI):
+    """
+    Render and save a layout. 'compact' renders it at `dpi` for EMBED_WIDTH_IN and stores it 1-bit.
+    Returns (bytes of the plain RGB PNG, bytes written).
+    """
+    img = render_layout(layout)
+    if fmt != "compact":
+        written = save_image(img, outpath)
+        return written, written
+    scale = EMBED_WIDTH_IN * dpi / layout["size"][0]
+    return _png_size(img), save_image(render_layout(layout, scale), outpath, fmt, dpi)
+
+def save_layout_svg(layout, outpath):
+    """Write a layout as a vector SVG at its natural size."""
+    w, h = layout["size"]
+    body = ""
+    for x, y, rw, rh in layout["rects"]:
+        body += f'<rect x="{x}" y="{y}" width="{rw}" height="{rh}"/>\n'
+    for cx, cy, r in layout["circles"]:
+        body += f'<circle cx="{cx}" cy="{cy}" r="{r}"/>\n'
+    for x, y, text, size in layout["texts"]:
+        if not text:
+            continue
+        text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        body += (f'<text x="{x}" y="{y}" font-family="DejaVu Sans, sans-serif" font-size="{size}" '
+                 f'fill="black" stroke="none" dominant-baseline="hanging">{text}</text>\n')
+    with open(outpath, "w", encoding="utf-8") as f:
+        f.write(
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{w}" height="{h}" viewBox="0 0 {w} {h}">\n'
+            f'<rect width="{w}" height="{h}" fill="white"/>\n'
+            f'<g fill="none" stroke="black" stroke-width="1">\n{body}</g>\n</svg>\n'
+        )
+    print("Saved svg:", outpath)
+    return outpath
+
+def make_uniform_table_image(shirts, pants, outpath, cellw=140, cellh=60, fmt="png", dpi=DEFAULT_DPI, stats=None):
+    layout = uniform_table_layout(shirts, pants, cellw, cellh)
+    _record(stats, outpath, *save_layout(layout, outpath, fmt, dpi))
+    print("Saved table image:", outpath)
+    return outpath
+
+def make_packed_balls_image(rows, cols, radius, outpath, spacing=None, fmt="png", dpi=DEFAULT_DPI, stats=None):
+    layout = packed_balls_layout(rows, cols, radius, spacing)
+    _record(stats, outpath, *save_layout(layout, outpath, fmt, dpi))
     print("Saved balls image:", outpath)
     return outpath
 
-def make_text_banner_image(text, outpath, width=800, height=200):
+def make_text_banner_image(text, outpath, width=800, height=200, fmt="png", dpi=DEFAULT_DPI, stats=None):
     img = Image.new("RGB", (width, height), "white")
     draw = ImageDraw.Draw(img)
     try:
@@ -86,11 +203,12 @@ def make_text_banner_image(text, outpath, width=800, height=200):
         draw.text(((width - w) / 2, y_text), line, font=font, fill="black")
         y_text += h + 5
 
-    img.save(outpath)
+    written = save_image(img, outpath, fmt, dpi)
+    _record(stats, outpath, _png_size(img) if fmt == "compact" else written, written)
     print("Saved banner image:", outpath)
     return outpath
 
-def auto_generate_images(questions_json, out_dir):
+def auto_generate_images(questions_json, out_dir, fmt="png", dpi=DEFAULT_DPI, svg=False, stats=None):
     ensure_dir(out_dir)
     data = load_json(questions_json)
     results = {}
@@ -102,13 +220,17 @@ def auto_generate_images(questions_json, out_dir):
             shirts = ["Blue","Green","Gray","White"]
             pants = ["Black","Khaki","Navy"]
             path = os.path.join(out_dir, f"{title}_table.png")
-            make_uniform_table_image(shirts, pants, path)
+            make_uniform_table_image(shirts, pants, path, fmt=fmt, dpi=dpi, stats=stats)
+            if svg:
+                save_layout_svg(uniform_table_layout(shirts, pants), path[:-4] + ".svg")
         elif "ball" in qt or "radius" in qt or "packed" in qt:
             path = os.path.join(out_dir, f"{title}_balls.png")
-            make_packed_balls_image(2, 3, radius=20, outpath=path)
+            make_packed_balls_image(2, 3, radius=20, outpath=path, fmt=fmt, dpi=dpi, stats=stats)
+            if svg:
+                save_layout_svg(packed_balls_layout(2, 3, radius=20), path[:-4] + ".svg")
         else:
             path = os.path.join(out_dir, f"{title}_banner.png")
-            make_text_banner_image(q.get("title", "Question"), path)
+            make_text_banner_image(q.get("title", "Question"), path, fmt=fmt, dpi=dpi, stats=stats)
 
         results[q.get("order")] = path
     return results
@@ -117,9 +239,20 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", required=True, help="questions.json")
     parser.add_argument("--out", required=True, help="out images dir")
+    parser.add_argument("--format", choices=["png", "compact"], default="png",
+                        help="png: full RGB; compact: 1-bit optimized PNG sized for the embed width at --dpi")
+    parser.add_argument("--dpi", type=positive_int, default=DEFAULT_DPI,
+                        help="compact output: diagrams are rendered at this DPI for the 3.5in embed width")
+    parser.add_argument("--svg", action="store_true", help="also write vector .svg copies of line-art diagrams")
     args = parser.parse_args()
-    paths = auto_generate_images(args.input, args.out)
+    stats = {}
+    paths = auto_generate_images(args.input, args.out, fmt=args.format, dpi=args.dpi, svg=args.svg, stats=stats)
     print("Generated images map:", paths)
+    if args.format == "compact" and stats:
+        rgb = sum(r for r, _ in stats.values())
+        out = sum(o for _, o in stats.values())
+        pct = 100.0 * (rgb - out) / rgb if rgb else 0.0
+        print(f"Image bytes (RGB PNG -> compact): {rgb} -> {out} (saved {rgb - out}, {pct:.1f}%)")
 
 if __name__ == "__main__":
     main()
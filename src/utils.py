@@ -1,6 +1,7 @@
 # utils.py
 import os
 import json
+import argparse
 from pathlib import Path
 
 def ensure_dir(p):
@@ -14,3 +15,23 @@ def save_json(obj, path):
 def load_json(path):
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
+
+def positive_int(value):
+    """argparse type for options like --dpi that must be >= 1."""
+    try:
+        n = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {value!r}")
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {value!r}")
+    return n
+
+def non_negative_int(value):
+    """argparse type for options like --image-budget that must be >= 0."""
+    try:
+        n = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a non-negative integer, got {value!r}")
+    if n < 0:
+        raise argparse.ArgumentTypeError(f"expected a non-negative integer, got {value!r}")
+    return n